@@ -1,171 +1,412 @@
+import hashlib
+import heapq
+import os
+import sqlite3
 import subprocess
+import threading
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterable, Iterator, Union
 import re
 from collections import Counter
-import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-from faster_whisper import WhisperModel
+# Antes de importar numpy/faster-whisper: el runtime de OpenMP lee OMP_NUM_THREADS
+# al cargarse. Por defecto usamos todos los núcleos.
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 1))
+
+import numpy as np
+import orjson
+from faster_whisper import BatchedInferencePipeline, WhisperModel
 import pyttsx3
 from googletrans import Translator
 from gtts import gTTS
 
 
-# ----------------- EXTRACCIÓN DE AUDIO -----------------
+# ----------------- TRANSCRIPCIÓN -----------------
 
-def extract_audio(video_path: Path) -> Path:
-    """Extrae el audio del video con FFmpeg y devuelve la ruta del .wav."""
-    audio_path = video_path.with_suffix(".wav")
+# Un modelo por (tamaño, compute_type): cargarlo cuesta segundos, así que se reutiliza.
+_MODELS: Dict[tuple, WhisperModel] = {}
+_PIPELINES: Dict[tuple, BatchedInferencePipeline] = {}
+_MODELS_LOCK = threading.Lock()
 
-    cmd = [
-        "ffmpeg",
-        "-y",                 # sobrescribir si existe
-        "-i", str(video_path),
-        "-vn",                # sin video
-        "-acodec", "pcm_s16le",
-        "-ar", "16000",       # 16 kHz
-        "-ac", "1",           # 1 canal (mono)
-        str(audio_path),
-    ]
 
+def _cpu_threads() -> int:
+    """Threads para CTranslate2: OMP_NUM_THREADS si es un entero válido, si no todos los núcleos."""
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except FileNotFoundError:
-        raise RuntimeError("No se encontró 'ffmpeg' en el PATH. Instalalo y probá de nuevo.")
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"FFmpeg error: {e.stderr.decode()}")
-
-    return audio_path
-
-
-# ----------------- TRANSCRIPCIÓN -----------------
-
-def transcribe(audio_path: Path, language: Optional[str] = None) -> List[Dict]:
+        n = int(os.environ.get("OMP_NUM_THREADS", ""))
+    except ValueError:
+        n = 0
+    return n if n > 0 else (os.cpu_count() or 1)
+
+
+def _get_model(size: str = "small", compute_type: str = "int8") -> WhisperModel:
+    """Devuelve el WhisperModel cacheado (lo crea la primera vez)."""
+    key = (size, compute_type)
+    with _MODELS_LOCK:
+        model = _MODELS.get(key)
+        if model is None:
+            model = WhisperModel(
+                size,
+                device="cpu",
+                compute_type=compute_type,  # CPU-friendly
+                cpu_threads=_cpu_threads(),
+                num_workers=2,
+            )
+            _MODELS[key] = model
+    return model
+
+
+def _get_pipeline(size: str = "small", compute_type: str = "int8") -> BatchedInferencePipeline:
+    """Pipeline batcheado (chunks por VAD) sobre el modelo cacheado."""
+    key = (size, compute_type)
+    model = _get_model(size, compute_type)
+    with _MODELS_LOCK:
+        pipeline = _PIPELINES.get(key)
+        if pipeline is None:
+            pipeline = BatchedInferencePipeline(model=model)
+            _PIPELINES[key] = pipeline
+    return pipeline
+
+
+# Modelos distilados (~2x más rápidos, mismo WER) solo existen para inglés.
+_DISTIL_MODELS = {"en": "distil-small.en"}
+
+
+def _model_name_for(language: Optional[str]) -> str:
+    return _DISTIL_MODELS.get(language or "", "small")
+
+
+def iter_transcribe(
+    audio: Union[Path, np.ndarray],
+    language: Optional[str] = None,
+    beam_size: int = 1,
+    batch_size: int = 8,
+) -> Iterator[Dict]:
     """
-    Transcribe con faster-whisper -> lista de {start, end, text}.
+    Transcribe con faster-whisper y va entregando {start, end, text} a medida
+    que se decodifica cada segmento (no espera al final del audio).
+    Acepta la ruta del video/audio (faster-whisper lo decodifica con PyAV, sin
+    pasar por un .wav) o un array float32 de muestras a 16 kHz.
+    Por defecto decodifica en modo greedy (beam_size=1), mucho más rápido en CPU;
+    pasar beam_size > 1 para usar beam search.
+    Los chunks de voz (VAD) se decodifican de a batch_size por vez.
     """
-    model = WhisperModel("small", compute_type="int8")  # CPU-friendly
-    segments, _info = model.transcribe(
-        str(audio_path),
+    pipeline = _get_pipeline(_model_name_for(language), "int8")
+    segments, _info = pipeline.transcribe(
+        audio if isinstance(audio, np.ndarray) else str(audio),
         language=language,  # None => autodetección
         vad_filter=True,
         vad_parameters={"min_silence_duration_ms": 500},
-        beam_size=5,
+        beam_size=beam_size,
+        best_of=1,
+        temperature=0.0,
+        condition_on_previous_text=False,
+        without_timestamps=False,  # el pipeline batcheado daría un segmento por chunk de 30 s
+        batch_size=batch_size,
     )
 
-    results: List[Dict] = []
     for seg in segments:
         text = (seg.text or "").strip()
         if text:
-            results.append({"start": float(seg.start), "end": float(seg.end), "text": text})
-    return results
+            yield {"start": float(seg.start), "end": float(seg.end), "text": text}
+
+
+def transcribe(
+    audio: Union[Path, np.ndarray],
+    language: Optional[str] = None,
+    beam_size: int = 1,
+    batch_size: int = 8,
+) -> List[Dict]:
+    """Igual que iter_transcribe() pero devuelve la lista completa."""
+    return list(iter_transcribe(audio, language=language, beam_size=beam_size, batch_size=batch_size))
+
+
+def warmup(languages: Iterable[Optional[str]] = (None, "en")) -> None:
+    """
+    Carga los modelos que usaría transcribe() para esos idiomas (por defecto el
+    multilingüe y el distilado de inglés) y corre 0.1 s de silencio en cada uno
+    para inicializar CTranslate2.
+    Pensado para llamarse al arrancar cada worker, así el primer upload no paga
+    la carga. No llamar antes de un fork: los threads de CTranslate2 no se heredan.
+    """
+    for language in languages:
+        size = _model_name_for(language)
+        _get_pipeline(size, "int8")
+        segments, _info = _get_model(size, "int8").transcribe(
+            np.zeros(1600, dtype=np.float32),  # 0.1 s a 16 kHz
+            language=language or "es",
+            beam_size=1,
+            vad_filter=False,
+        )
+        list(segments)  # el generador es perezoso: hay que consumirlo
 
 
 # ----------------- ARCHIVOS DE SUBTÍTULOS -----------------
 
+def _split_ts(seconds: float) -> tuple:
+    """Segundos -> (horas, minutos, segundos, milisegundos)."""
+    total_ms = int(seconds * 1000)
+    total_s, ms = divmod(total_ms, 1000)
+    minutes, sec = divmod(total_s, 60)
+    hours, minutes = divmod(minutes, 60)
+    return hours, minutes, sec, ms
+
+
+def _ts(seconds: float, sep: str) -> str:
+    h, m, s, ms = _split_ts(seconds)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def _srt_cue(i: int, seg: Dict) -> str:
+    return f"{i}\n{_ts(seg['start'], ',')} --> {_ts(seg['end'], ',')}\n{seg['text']}\n\n"
+
+
+def _vtt_cue(seg: Dict) -> str:
+    return f"{_ts(seg['start'], '.')} --> {_ts(seg['end'], '.')}\n{seg['text']}\n\n"
+
+
 def write_srt(segments: List[Dict], srt_path: Path) -> None:
     """Crea archivo .srt a partir de los segmentos."""
-    def ts(seconds: float) -> str:
-        ms = int((seconds - int(seconds)) * 1000)
-        sec = int(seconds) % 60
-        minutes = (int(seconds) // 60) % 60
-        hours = int(seconds) // 3600
-        return f"{hours:02d}:{minutes:02d}:{sec:02d},{ms:03d}"
-
-    with open(srt_path, "w", encoding="utf-8") as f:
-        for i, seg in enumerate(segments, start=1):
-            f.write(f"{i}\n{ts(seg['start'])} --> {ts(seg['end'])}\n{seg['text']}\n\n")
+    srt_path.write_text(
+        "".join(_srt_cue(i, seg) for i, seg in enumerate(segments, start=1)), encoding="utf-8"
+    )
 
 
 def write_vtt(segments: List[Dict], vtt_path: Path) -> None:
     """Crea archivo .vtt (WebVTT) a partir de los segmentos."""
-    def ts(seconds: float) -> str:
-        ms = int((seconds - int(seconds)) * 1000)
-        sec = int(seconds) % 60
-        minutes = (int(seconds) // 60) % 60
-        hours = int(seconds) // 3600
-        return f"{hours:02d}:{minutes:02d}:{sec:02d}.{ms:03d}"
+    vtt_path.write_text("WEBVTT\n\n" + "".join(_vtt_cue(seg) for seg in segments), encoding="utf-8")
+
 
-    with open(vtt_path, "w", encoding="utf-8") as f:
-        f.write("WEBVTT\n\n")
-        for seg in segments:
-            f.write(f"{ts(seg['start'])} --> {ts(seg['end'])}\n{seg['text']}\n\n")
+def stream_subtitles(segments: Iterable[Dict], srt_path: Path, vtt_path: Path) -> Iterator[Dict]:
+    """
+    Escribe cada segmento en el .srt y el .vtt apenas llega y lo vuelve a entregar,
+    así los subtítulos se generan mientras la transcripción sigue corriendo
+    (iter_transcribe entrega los segmentos de a un batch de chunks).
+    """
+    with open(srt_path, "w", encoding="utf-8") as srt, open(vtt_path, "w", encoding="utf-8") as vtt:
+        vtt.write("WEBVTT\n\n")
+        for i, seg in enumerate(segments, start=1):
+            srt.write(_srt_cue(i, seg))
+            vtt.write(_vtt_cue(seg))
+            yield seg
 
 
 # ----------------- RESUMEN -----------------
 
+_WS_RE = re.compile(r"\s+")
+_SENT_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_RE = re.compile(r"[a-záéíóúñüA-ZÁÉÍÓÚÑÜ]+")
+_STOP = frozenset("""
+    de la que el en y a los las un una para con por del se al lo es
+    como más muy ya no sí o pero también si esto esta este estos estas
+    fue fueron son ser sobre entre hasta donde cuando porque
+""".split())
+
+
 def summarize(full_text: str, max_sentences: int = 4) -> str:
     """Resumen por frecuencia de palabras (simple, offline)."""
-    text = re.sub(r"\s+", " ", full_text).strip()
+    text = _WS_RE.sub(" ", full_text).strip()
     if not text:
         return "No se pudo generar un resumen."
 
-    sentences = re.split(r"(?<=[.!?])\s+", text)
+    sentences = _SENT_RE.split(text)
     if len(sentences) <= max_sentences:
         return text
 
-    words = re.findall(r"[a-záéíóúñüA-ZÁÉÍÓÚÑÜ]+", text.lower())
-    stop = set("""
-        de la que el en y a los las un una para con por del se al lo es
-        como más muy ya no sí o pero también si esto esta este estos estas
-        fue fueron son ser sobre entre hasta donde cuando porque
-    """.split())
-    words = [w for w in words if w not in stop and len(w) > 2]
-    freq = Counter(words)
+    # Tokenizamos cada oración una sola vez y reusamos los tokens para puntuar.
+    sent_tokens = [_WORD_RE.findall(s.lower()) for s in sentences]
+    freq = Counter(t for toks in sent_tokens for t in toks if t not in _STOP and len(t) > 2)
+    scores = [sum(freq.get(t, 0) for t in toks) for toks in sent_tokens]
 
-    scored = []
-    for s in sentences:
-        tokens = re.findall(r"[a-záéíóúñüA-ZÁÉÍÓÚÑÜ]+", s.lower())
-        score = sum(freq.get(t, 0) for t in tokens)
-        scored.append((score, s))
-
-    top = [s for _, s in sorted(scored, key=lambda x: x[0], reverse=True)[:max_sentences]]
-    top_set = set(top)
-    ordered = [s for s in sentences if s in top_set]
-    return " ".join(ordered)
+    # A igual puntaje gana la oración que aparece antes.
+    top = heapq.nlargest(max_sentences, range(len(sentences)), key=lambda i: (scores[i], -i))
+    return " ".join(sentences[i] for i in sorted(top))
 
 
 # ----------------- TRADUCCIÓN -----------------
 
+# Memoria de traducción: (md5 del texto, idioma) -> traducción, persistida en SQLite
+# para no volver a pedirle a Google frases que ya tradujimos (en este u otro video).
+TM_PATH = Path(__file__).resolve().parents[1] / "data" / "tm.sqlite"
+_TM_LOCK = threading.Lock()
+_tm_conn: Optional[sqlite3.Connection] = None
+
+
+def _tm_db() -> sqlite3.Connection:
+    global _tm_conn
+    if _tm_conn is None:
+        TM_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(TM_PATH), check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tm ("
+            "hash TEXT, lang TEXT, text TEXT, PRIMARY KEY (hash, lang))"
+        )
+        conn.commit()
+        _tm_conn = conn
+    return _tm_conn
+
+
+def _tm_hash(text: str) -> str:
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def _tm_get(key: str, lang: str) -> str:
+    """Busca en la memoria; lanza KeyError si no está (los errores no se cachean)."""
+    with _TM_LOCK:
+        row = _tm_db().execute(
+            "SELECT text FROM tm WHERE hash = ? AND lang = ?", (key, lang)
+        ).fetchone()
+    if row is None:
+        raise KeyError(key)
+    return row[0]
+
+
+def _tm_put(pairs: List[tuple], lang: str) -> None:
+    """Guarda pares (texto original, traducción) para 'lang'."""
+    if not pairs:
+        return
+    with _TM_LOCK:
+        conn = _tm_db()
+        conn.executemany(
+            "INSERT OR REPLACE INTO tm (hash, lang, text) VALUES (?, ?, ?)",
+            [(_tm_hash(src), lang, dst) for src, dst in pairs],
+        )
+        conn.commit()
+
+
+def _tm_lookup(text: str, lang: str) -> Optional[str]:
+    try:
+        return _tm_get(_tm_hash(text), lang)
+    except KeyError:
+        return None
+
+
+def _translate_one(tr: Translator, text: str, target_lang: str) -> str:
+    """Traduce un texto pasando por la memoria de traducción."""
+    cached = _tm_lookup(text, target_lang)
+    if cached is not None:
+        return cached
+    ttxt = tr.translate(text, dest=target_lang).text
+    _tm_put([(text, ttxt)], target_lang)
+    return ttxt
+
+
 def translate_summary(text: str, target_langs: List[str]) -> Dict[str, str]:
-    """Traduce el texto a múltiples idiomas (googletrans)."""
-    if not text.strip():
+    """Traduce el texto a múltiples idiomas (googletrans), en paralelo."""
+    if not text.strip() or not target_langs:
         return {}
     tr = Translator()
     out: Dict[str, str] = {}
-    for lang in target_langs:
+    with ThreadPoolExecutor(max_workers=min(8, len(target_langs))) as ex:
+        futures = {lang: ex.submit(_translate_one, tr, text, lang) for lang in target_langs}
+        for lang, fut in futures.items():
+            try:
+                out[lang] = fut.result()
+            except Exception:
+                out[lang] = ""
+    return out
+
+
+# Separador que Google no traduce; permite mandar muchos segmentos en un solo request.
+_SEG_SEP = "\n⟪§⟫\n"
+_SEG_SEP_RE = re.compile(r"\s*⟪\s*§\s*⟫\s*")
+_MAX_CHARS_PER_REQUEST = 4500  # googletrans corta cerca de 5000 caracteres
+
+
+def _translate_batch(tr: Translator, texts: List[str], target_lang: str) -> List[Optional[str]]:
+    """
+    Traduce una lista de textos con el mínimo de requests: los une con _SEG_SEP
+    en tandas de hasta _MAX_CHARS_PER_REQUEST caracteres. Si una tanda vuelve
+    con otra cantidad de partes, esa tanda se traduce texto por texto; si el
+    request falla, la tanda entera queda sin traducir.
+    Devuelve None en la posición de cada texto que no se pudo traducir.
+    """
+    out: List[Optional[str]] = []
+    i = 0
+    while i < len(texts):
+        batch = [texts[i]]
+        size = len(texts[i])
+        i += 1
+        while i < len(texts) and size + len(_SEG_SEP) + len(texts[i]) <= _MAX_CHARS_PER_REQUEST:
+            batch.append(texts[i])
+            size += len(_SEG_SEP) + len(texts[i])
+            i += 1
+
         try:
-            out[lang] = tr.translate(text, dest=lang).text
+            joined = tr.translate(_SEG_SEP.join(batch), dest=target_lang).text
         except Exception:
-            out[lang] = ""
+            # Error de red / rate limit: no insistimos texto por texto, la tanda queda sin traducir
+            out.extend([None] * len(batch))
+            continue
+        parts: List[Optional[str]] = [p.strip() for p in _SEG_SEP_RE.split(joined)]
+
+        if len(parts) != len(batch):
+            parts = []
+            for txt in batch:
+                try:
+                    parts.append(tr.translate(txt, dest=target_lang).text)
+                except Exception:
+                    parts.append(None)
+        out.extend(parts)
     return out
 
 
+def _translate_texts(texts: List[str], target_lang: str) -> List[str]:
+    """
+    Traduce 'texts' consultando primero la memoria de traducción; solo lo que
+    falta se manda a Google (en tandas). Si algo falla, queda el texto original.
+    """
+    out: List[Optional[str]] = [_tm_lookup(t, target_lang) for t in texts]
+    missing = [i for i, t in enumerate(out) if t is None]
+    if missing:
+        translated = _translate_batch(Translator(), [texts[i] for i in missing], target_lang)
+        fresh = []
+        for i, ttxt in zip(missing, translated):
+            if ttxt is not None:
+                out[i] = ttxt
+                fresh.append((texts[i], ttxt))
+        _tm_put(fresh, target_lang)
+    return [t if t is not None else src for t, src in zip(out, texts)]
+
+
 def translate_segments(segments: List[Dict], target_lang: str) -> List[Dict]:
     """
     Traduce cada segmento a 'target_lang' preservando tiempos.
     Útil para generar WebVTT traducido que se sincroniza con el video.
     """
-    tr = Translator()
-    out: List[Dict] = []
-    for seg in segments:
-        txt = seg["text"]
-        try:
-            ttxt = tr.translate(txt, dest=target_lang).text
-        except Exception:
-            ttxt = txt  # si falla, dejamos original
-        out.append({"start": seg["start"], "end": seg["end"], "text": ttxt})
-    return out
+    if not segments:
+        return []
+    # Las frases repetidas ("ok", "gracias") se traducen una sola vez.
+    uniq = list(dict.fromkeys(seg["text"] for seg in segments))
+    mapping = dict(zip(uniq, _translate_texts(uniq, target_lang)))
+    return [
+        {"start": seg["start"], "end": seg["end"], "text": mapping[seg["text"]]}
+        for seg in segments
+    ]
 
 
 # ----------------- GUARDAR/CARGAR SEGMENTOS -----------------
 
+# JSON indentado solo para depurar a mano (VIDEOCONV_PRETTY_JSON=1).
+_JSON_OPTS = orjson.OPT_INDENT_2 if os.environ.get("VIDEOCONV_PRETTY_JSON") == "1" else 0
+
+
+def write_json(data, path: Path) -> None:
+    path.write_bytes(orjson.dumps(data, option=_JSON_OPTS))
+
+
+def read_json(path: Path):
+    return orjson.loads(path.read_bytes())
+
+
 def save_segments(segments: List[Dict], path: Path) -> None:
-    path.write_text(json.dumps(segments, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_json(segments, path)
 
 
 def load_segments(path: Path) -> List[Dict]:
-    return json.loads(path.read_text(encoding="utf-8"))
+    return read_json(path)
 
 
 # ----------------- TTS -----------------
@@ -186,23 +427,70 @@ def _pick_voice_id_for_lang(engine, lang: str):
     return None
 
 
+# Crear el engine carga las voces y levanta el driver: se hace una vez por thread.
+# No se comparte entre threads porque SAPI5 (Windows) es un objeto COM de
+# apartamento: solo se puede usar desde el thread que lo creó. Se instancia
+# pyttsx3.Engine directamente porque pyttsx3.init() devuelve el mismo engine
+# cacheado para todo el proceso. Los drivers nativos no toleran síntesis
+# simultáneas, así que el uso igual pasa por _PYTTSX3_LOCK.
+_PYTTSX3_LOCAL = threading.local()
+_PYTTSX3_LOCK = threading.Lock()
+
+
+def _get_engine():
+    engine = getattr(_PYTTSX3_LOCAL, "engine", None)
+    if engine is None:
+        engine = pyttsx3.Engine()
+        engine.setProperty("rate", 180)
+        engine.setProperty("volume", 1.0)
+        _PYTTSX3_LOCAL.engine = engine
+        _PYTTSX3_LOCAL.voices = {"default": engine.getProperty("voice")}
+    return engine
+
+
 def _tts_pyttsx3(text: str, out_path: Path, lang: str) -> Path:
-    engine = pyttsx3.init()
-    vid = _pick_voice_id_for_lang(engine, lang)
-    if vid:
-        engine.setProperty("voice", vid)
-    engine.setProperty("rate", 180)
-    engine.setProperty("volume", 1.0)
     out_wav = out_path.with_suffix(".wav")
-    engine.save_to_file(text, str(out_wav))
-    engine.runAndWait()
+    with _PYTTSX3_LOCK:
+        try:
+            engine = _get_engine()
+            voices: Dict[str, Optional[str]] = _PYTTSX3_LOCAL.voices
+            if lang not in voices:
+                voices[lang] = _pick_voice_id_for_lang(engine, lang)
+            vid = voices[lang] or voices["default"]
+            if vid:
+                engine.setProperty("voice", vid)
+            engine.save_to_file(text, str(out_wav))
+            engine.runAndWait()
+        except Exception:
+            # Si el driver falla dentro del loop, el engine queda con _inLoop=True y
+            # todo uso posterior lanza 'run loop already started': lo descartamos.
+            _PYTTSX3_LOCAL.engine = None
+            raise
     return out_wav
 
 
+def _tts_espeak(text: str, out_path: Path, lang: str) -> Path:
+    """
+    TTS offline con espeak-ng, convertido a .mp3 con FFmpeg.
+    El WAV viaja por pipes (espeak-ng --stdout -> ffmpeg stdin), sin archivo intermedio.
+    """
+    out_mp3 = out_path.with_suffix(".mp3")
+    wav = subprocess.run(
+        ["espeak-ng", "-v", lang, "--stdout", "--stdin"],
+        input=text.encode("utf-8"), check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    ).stdout
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-y", "-i", "pipe:0", "-codec:a", "libmp3lame", str(out_mp3)],
+        input=wav, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    return out_mp3
+
+
 def tts_synthesize(text: str, out_path: Path, lang: str = "es") -> Path:
     """
     Genera audio del texto en el idioma solicitado.
-    Intenta gTTS (.mp3) y si falla usa pyttsx3 (.wav).
+    Intenta gTTS (.mp3); si falla, espeak-ng + FFmpeg (.mp3) y como último
+    recurso pyttsx3 (.wav).
     """
     try:
         out_mp3 = out_path.with_suffix(".mp3")
@@ -210,4 +498,8 @@ def tts_synthesize(text: str, out_path: Path, lang: str = "es") -> Path:
         tts.save(str(out_mp3))
         return out_mp3
     except Exception:
+        pass
+    try:
+        return _tts_espeak(text, out_path, lang)
+    except (OSError, subprocess.CalledProcessError):
         return _tts_pyttsx3(text, out_path, lang)
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-import json
+import os
+import threading
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from flask import (
     Flask,
@@ -17,18 +20,18 @@ from flask import (
 )
 
 from app.pipeline import (
-    extract_audio,
-    transcribe,
-    write_srt,
+    iter_transcribe,
     write_vtt,
+    stream_subtitles,
     summarize,
     translate_summary,
     translate_segments,
     tts_synthesize,
+    read_json,
+    write_json,
+    warmup,
 )
 
-from googletrans import Translator
-
 
 APP_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = APP_ROOT / "data"
@@ -43,6 +46,30 @@ for d in (DATA_DIR, VIDEOS_DIR, AUDIO_DIR, OUTPUTS_DIR, TEMP_DIR):
 app = Flask(__name__, template_folder="templates", static_folder="static")
 app.secret_key = "videoconv-dev"
 
+# Videos, VTT y SRT son inmutables por uid; lo que se regenera va con ?v= (ver _versioned_url).
+MEDIA_MAX_AGE = 86400
+
+# Los uploads se procesan en segundo plano; el request solo guarda el video.
+_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.environ.get("VIDEOCONV_WORKERS", "2")))
+_JOBS: Dict[str, Future] = {}
+
+# Mientras un job corre, su proceso toca job_<uid>.alive cada HEARTBEAT_SECS. Si el
+# proceso muere (reloader de debug, reinicio de gunicorn) el archivo deja de
+# actualizarse y el estado "running" se considera huérfano.
+HEARTBEAT_SECS = 10
+HEARTBEAT_STALE_SECS = 6 * HEARTBEAT_SECS
+
+
+# Fuera del servidor de desarrollo (WSGI, gunicorn) el modelo se carga al importar la
+# app en cada worker, y no en el primer upload. VIDEOCONV_WARMUP=0 lo desactiva.
+# Si falla (sin red ni caché de modelos) la app arranca igual; el modelo se carga en el
+# primer upload y el error, si persiste, aparece ahí.
+if __name__ != "__main__" and not app.debug and os.environ.get("VIDEOCONV_WARMUP", "1") != "0":
+    try:
+        warmup()
+    except Exception:
+        app.logger.warning("No se pudo precargar el modelo de Whisper", exc_info=True)
+
 
 def _state_path(file_id: str) -> Path:
     return TEMP_DIR / f"state_{file_id}.json"
@@ -51,12 +78,70 @@ def _state_path(file_id: str) -> Path:
 def load_state(file_id: str) -> dict:
     p = _state_path(file_id)
     if p.exists():
-        return json.loads(p.read_text(encoding="utf-8"))
+        return read_json(p)
     return {}
 
 
 def save_state(file_id: str, data: dict) -> None:
-    _state_path(file_id).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Escribimos a un temporal y renombramos: el worker y los requests leen/escriben
+    # el mismo archivo y nunca tienen que ver un JSON a medio escribir.
+    p = _state_path(file_id)
+    tmp = p.with_name(f"{p.name}.{uuid.uuid4().hex[:6]}.tmp")
+    write_json(data, tmp)
+    os.replace(tmp, p)
+
+
+def _heartbeat_path(file_id: str) -> Path:
+    return TEMP_DIR / f"job_{file_id}.alive"
+
+
+def _heartbeat_loop() -> None:
+    while True:
+        for uid in list(_JOBS):
+            try:
+                _heartbeat_path(uid).touch()
+            except OSError:
+                pass
+        time.sleep(HEARTBEAT_SECS)
+
+
+threading.Thread(target=_heartbeat_loop, name="videoconv-heartbeat", daemon=True).start()
+
+
+def _job_alive(file_id: str) -> bool:
+    if file_id in _JOBS:
+        return True
+    try:
+        return time.time() - _heartbeat_path(file_id).stat().st_mtime < HEARTBEAT_STALE_SECS
+    except FileNotFoundError:
+        return False
+
+
+def _job_done(uid: str, fut: Future) -> None:
+    """Cierra el job; si process_video explotó fuera de su try, lo registra en el estado."""
+    _JOBS.pop(uid, None)
+    _heartbeat_path(uid).unlink(missing_ok=True)
+    exc = fut.exception()
+    if exc is not None:
+        app.logger.error("process_video(%s) falló", uid, exc_info=exc)
+        st = load_state(uid)
+        st.update({"status": "error", "error": str(exc)})
+        save_state(uid, st)
+
+
+def load_job_state(file_id: str) -> dict:
+    """
+    load_state() que además detecta jobs huérfanos: un estado "running" cuyo
+    proceso ya no existe pasa a "error" en vez de quedar esperando para siempre.
+    """
+    st = load_state(file_id)
+    if st.get("status") == "running" and not _job_alive(file_id):
+        st.update({
+            "status": "error",
+            "error": "el procesamiento se interrumpió (¿se reinició el servidor?). Subí el video de nuevo.",
+        })
+        save_state(file_id, st)
+    return st
 
 
 def _fmt_size(n_bytes: int) -> str:
@@ -68,19 +153,62 @@ def _fmt_size(n_bytes: int) -> str:
         size /= 1024.0
 
 
+def _summarize_and_tts(file_id: str, full_text: str, sum_lang: str) -> Tuple[str, Optional[str], str]:
+    """
+    Resume, traduce a 'sum_lang' y sintetiza el audio del resumen.
+    Devuelve (texto, nombre del audio o None, nombre del .txt).
+    """
+    base_summary = summarize(full_text)
+
+    summary_text = base_summary
+    if sum_lang != "es":
+        summary_text = translate_summary(base_summary, [sum_lang]).get(sum_lang) or base_summary
+
+    # TTS versionado por idioma
+    try:
+        tts_base = AUDIO_DIR / f"summary_{file_id}_{sum_lang}"
+        summary_audio_name = tts_synthesize(summary_text, tts_base, lang=sum_lang).name
+    except Exception:
+        summary_audio_name = None
+
+    txt_name = f"summary_{file_id}.txt"
+    (OUTPUTS_DIR / txt_name).write_text(summary_text, encoding="utf-8")
+    return summary_text, summary_audio_name, txt_name
+
+
+def _versioned_url(endpoint: str, directory: Path, filename: str) -> str:
+    """
+    URL con ?v=<mtime>: los archivos que se regeneran con el mismo nombre
+    (resumen .mp3/.txt) cambian de URL solo cuando se vuelven a escribir.
+    Un stat alcanza; no hace falta leer el archivo en cada render. Si el archivo
+    ya no está, devolvemos la URL sin versión (como antes) en vez de fallar.
+    """
+    try:
+        mtime = (directory / filename).stat().st_mtime_ns
+    except FileNotFoundError:
+        return url_for(endpoint, filename=filename)
+    return url_for(endpoint, filename=filename, v=mtime)
+
+
 @app.route("/videos/<path:filename>")
 def videos(filename):
-    return send_from_directory(VIDEOS_DIR, filename, as_attachment=False)
+    return send_from_directory(
+        VIDEOS_DIR, filename, as_attachment=False, conditional=True, max_age=MEDIA_MAX_AGE
+    )
 
 
 @app.route("/audio/<path:filename>")
 def audio(filename):
-    return send_from_directory(AUDIO_DIR, filename, as_attachment=False)
+    return send_from_directory(
+        AUDIO_DIR, filename, as_attachment=False, conditional=True, max_age=MEDIA_MAX_AGE
+    )
 
 
 @app.route("/outputs/<path:filename>")
 def outputs(filename):
-    return send_from_directory(OUTPUTS_DIR, filename, as_attachment=False)
+    return send_from_directory(
+        OUTPUTS_DIR, filename, as_attachment=False, conditional=True, max_age=MEDIA_MAX_AGE
+    )
 
 
 @app.get("/")
@@ -108,48 +236,49 @@ def do_upload():
     video_path = VIDEOS_DIR / video_name
     f.save(video_path)
 
+    save_state(uid, {
+        "file_id": uid,
+        "status": "running",
+        "video_name": video_name,
+        "video_size": video_path.stat().st_size,
+        "used_language": audio_lang,
+        "summary_lang": summary_lang,
+    })
+    _heartbeat_path(uid).touch()
+    fut = _EXECUTOR.submit(process_video, uid, video_path, audio_lang, summary_lang)
+    _JOBS[uid] = fut
+    fut.add_done_callback(lambda f: _job_done(uid, f))
+
+    return redirect(url_for("workspace", file_id=uid))
+
+
+def process_video(uid: str, video_path: Path, audio_lang: str, summary_lang: str) -> None:
+    """
+    Pipeline completo de un upload (corre en _EXECUTOR, fuera del request).
+    Al terminar deja state_<uid>.json con status "done" o "error".
+    """
+    st = load_state(uid)
     try:
-        audio_path = extract_audio(video_path)
         lang_for_whisper = None if audio_lang == "auto" else audio_lang
-        segments = transcribe(audio_path, language=lang_for_whisper)
 
-        # SRT base
         srt_name = f"subs_{uid}_base.srt"
-        write_srt(segments, OUTPUTS_DIR / srt_name)
-
-        # VTT base (para que el <video> ya tenga una pista)
         base_lang = audio_lang if audio_lang != "auto" else "es"
         vtt_base_name = f"subs_{uid}_{base_lang}.vtt"
-        write_vtt(segments, OUTPUTS_DIR / vtt_base_name)
         tracks: Dict[str, str] = {base_lang: vtt_base_name}
 
-        # Resumen
+        # SRT base + VTT base (para que el <video> ya tenga una pista), escritos
+        # a medida que Whisper entrega cada segmento
+        segments: List[Dict] = list(stream_subtitles(
+            iter_transcribe(video_path, language=lang_for_whisper),
+            OUTPUTS_DIR / srt_name,
+            OUTPUTS_DIR / vtt_base_name,
+        ))
         full_text = " ".join(s["text"] for s in segments)
-        base_summary = summarize(full_text)
 
-        summary_text = base_summary
-        if summary_lang != "es":
-            try:
-                tr = Translator()
-                summary_text = tr.translate(base_summary, dest=summary_lang).text
-            except Exception:
-                pass
+        summary_text, summary_audio_name, txt_name = _summarize_and_tts(uid, full_text, summary_lang)
 
-        # TTS versionado por idioma
-        try:
-            tts_base = AUDIO_DIR / f"summary_{uid}_{summary_lang}"
-            final_audio = tts_synthesize(summary_text, tts_base, lang=summary_lang)
-            summary_audio_name = final_audio.name
-        except Exception:
-            summary_audio_name = None
-
-        txt_name = f"summary_{uid}.txt"
-        (OUTPUTS_DIR / txt_name).write_text(summary_text, encoding="utf-8")
-
-        st = {
-            "file_id": uid,
-            "video_name": video_name,
-            "video_size": video_path.stat().st_size,
+        st.update({
+            "status": "done",
             "segments": segments,
             "summary": summary_text,
             "detected_lang": None,
@@ -159,35 +288,41 @@ def do_upload():
             "srt_base": srt_name,
             "summary_txt": txt_name,
             "summary_audio": summary_audio_name,
-        }
-        save_state(uid, st)
+        })
     except Exception as e:
-        return render_template("upload.html", error=f"Procesamiento falló: {e}")
-
-    return redirect(url_for("workspace", file_id=uid))
+        st.update({"status": "error", "error": str(e)})
+    save_state(uid, st)
 
 
 @app.get("/workspace/<file_id>")
 def workspace(file_id: str):
-    st = load_state(file_id)
+    st = load_job_state(file_id)
     if not st:
         abort(404)
 
+    status = st.get("status", "done")
+    if status == "error":
+        return render_template("upload.html", error=f"Procesamiento falló: {st.get('error')}")
+
     video_name = st.get("video_name")
     video_url = url_for("videos", filename=video_name) if video_name else None
 
     srt_url = url_for("outputs", filename=st["srt_base"]) if st.get("srt_base") else None
-    txt_url = url_for("outputs", filename=st["summary_txt"]) if st.get("summary_txt") else None
+    txt_url = _versioned_url("outputs", OUTPUTS_DIR, st["summary_txt"]) if st.get("summary_txt") else None
 
     summary_audio_url = None
     if st.get("summary_audio"):
-        summary_audio_url = url_for("audio", filename=st["summary_audio"]) + f"?v={uuid.uuid4().hex[:6]}"
+        summary_audio_url = _versioned_url("audio", AUDIO_DIR, st["summary_audio"])
 
     tracks = st.get("tracks", {})
     tracks_urls = {lang: url_for("outputs", filename=fn) for lang, fn in tracks.items()}
     existing_tracks = list(tracks.keys())
 
-    size_human = _fmt_size((VIDEOS_DIR / video_name).stat().st_size) if video_name else None
+    # El tamaño ya quedó guardado en el estado al subir; evitamos un stat por render.
+    video_size = st.get("video_size")
+    if video_size is None and video_name:
+        video_size = (VIDEOS_DIR / video_name).stat().st_size
+    size_human = _fmt_size(video_size) if video_size is not None else None
 
     # Check for pending summary generation
     from flask import request
@@ -211,14 +346,17 @@ def workspace(file_id: str):
         existing_tracks=existing_tracks,
         tracks=tracks_urls,     # << urls para inyectar <track>
         summary_pending=summary_pending,
-    )
+        processing=(status == "running"),
+    ), (202 if status == "running" else 200)
 
 
 @app.post("/set_lang/<file_id>")
 def set_lang(file_id: str):
-    st = load_state(file_id)
+    st = load_job_state(file_id)
     if not st:
         abort(404)
+    if st.get("status", "done") != "done":
+        return redirect(url_for("workspace", file_id=file_id))
 
     new_lang = (request.form.get("lang") or "auto").strip()
     st["used_language"] = new_lang
@@ -228,35 +366,20 @@ def set_lang(file_id: str):
 
 @app.post("/summary/<file_id>")
 def summary(file_id: str):
-    st = load_state(file_id)
+    st = load_job_state(file_id)
     if not st:
         abort(404)
+    if st.get("status", "done") != "done":
+        return redirect(url_for("workspace", file_id=file_id))
 
     sum_lang = (request.form.get("sum_lang") or "es").strip()
     st["summary_lang"] = sum_lang
 
     full_text = " ".join(s["text"] for s in st.get("segments", []))
-    base_summary = summarize(full_text)
-
-    summary_text = base_summary
-    try:
-        if sum_lang != "es":
-            tr = Translator()
-            summary_text = tr.translate(base_summary, dest=sum_lang).text
-    except Exception:
-        pass
+    summary_text, summary_audio_name, txt_name = _summarize_and_tts(file_id, full_text, sum_lang)
 
     st["summary"] = summary_text
-
-    try:
-        tts_base = AUDIO_DIR / f"summary_{file_id}_{sum_lang}"
-        final_audio = tts_synthesize(summary_text, tts_base, lang=sum_lang)
-        st["summary_audio"] = final_audio.name
-    except Exception:
-        st["summary_audio"] = None
-
-    txt_name = f"summary_{file_id}.txt"
-    (OUTPUTS_DIR / txt_name).write_text(summary_text, encoding="utf-8")
+    st["summary_audio"] = summary_audio_name
     st["summary_txt"] = txt_name
 
     save_state(file_id, st)
@@ -266,9 +389,11 @@ def summary(file_id: str):
 
 @app.post("/generate_tracks/<file_id>")
 def generate_tracks(file_id: str):
-    st = load_state(file_id)
+    st = load_job_state(file_id)
     if not st:
         abort(404)
+    if st.get("status", "done") != "done":
+        return redirect(url_for("workspace", file_id=file_id))
 
     # Ahora soportamos un solo <select name="lang"> O un getlist("langs") si quedara compat.
     selected = request.form.get("lang")